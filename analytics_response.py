@@ -2,7 +2,8 @@
 
 import streamlit as st
 import pandas as pd
-from formatting import format_ci_currency, format_int
+from formatting import fmt_ci
+from prompt_text import frame_tsv
 import plotly.express as px
 
 
@@ -30,7 +31,7 @@ def render_analytics_response(
     df_display = df.copy()
     for col in df_display.columns:
         if "salary" in col.lower():
-            df_display[col] = df_display[col].apply(format_ci_currency)
+            df_display[col] = df_display[col].apply(fmt_ci)
 
     st.dataframe(
     df_display.style.set_properties(**{
@@ -43,11 +44,15 @@ def render_analytics_response(
     st.subheader("Chart")
 
     if chart_type == "auto":
-        # Ensure salary columns remain numeric for charting
-        for col in df.columns:
-            if "salary" in col.lower():
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-         # Pick x-axis
+        # Ensure salary columns remain numeric for charting (on a new
+        # frame: the caller's DataFrame is left untouched)
+        salary_cols = [c for c in df.columns if "salary" in c.lower()]
+        if salary_cols:
+            df = df.assign(**{
+                c: pd.to_numeric(df[c], errors="coerce") for c in salary_cols
+            })
+
+        # Pick x-axis
         if "year_month" in df.columns:
             x_col = "year_month"
         elif "posted_date" in df.columns:
@@ -78,7 +83,9 @@ def render_analytics_response(
     # 3) EXECUTIVE AI SUMMARY
     st.subheader(summary_title)
 
-    sample = df.head(100).to_dict(orient="records")
+    from app import stream_gpt   # imported here to avoid circular import
+
+    sample = frame_tsv(df.head(100))
 
     prompt = f"""
 You are an executive-level labour market analyst supporting the Cayman Islands government.
@@ -89,16 +96,17 @@ User question:
 Write a concise, professional summary using ONLY the data provided below.
 Avoid speculation or external facts.
 
-Data (first 100 records):
+Data (up to the first 100 records):
 {sample}
 """
 
+    # Streamed so the summary starts rendering at the first token;
+    # cache hits are written in one go
     try:
-        from app import ask_gpt   # imported here to avoid circular import
-        summary_text = ask_gpt(prompt).strip()
+        summary_text = st.write_stream(stream_gpt(prompt))
     except Exception as e:
         summary_text = f"Unable to generate AI summary: {e}"
+        st.write(summary_text)
 
-    st.write(summary_text)
-    return summary_text
+    return summary_text.strip()
 
@@ -5,25 +5,49 @@
 
 import streamlit as st
 import duckdb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
-from typing import Any, Optional
+from typing import Optional
 import time
 import os
 import requests
 import json
-
+import hashlib
+import csv
+import io
+import threading
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import httpx
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from openai import OpenAI     # <-- NEW SDK
 
 # ============================================================
 # OPENAI CLIENT INITIALIZATION (REQUIRED FOR GPT)
 # ============================================================
-from openai import OpenAI
+@st.cache_resource(show_spinner=False)
+def get_openai_client() -> OpenAI:
+    """
+    One OpenAI client per server process.
+    The shared httpx pool keeps TLS sessions alive between GPT calls
+    instead of reconnecting on every Streamlit rerun.
+    """
+    http_client = httpx.Client(
+        http2=True,
+        timeout=60,
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    )
+    return OpenAI(api_key=st.secrets["OPENAI_API_KEY"], http_client=http_client)
 
 if "OPENAI_API_KEY" in st.secrets:
-    client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+    client = get_openai_client()
 else:
     st.error("Missing OPENAI_API_KEY in Streamlit secrets.")
     st.stop()
@@ -37,20 +61,14 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-st.markdown(
-    """
-    <style>
-    .block-container {padding-top: 1.5rem;}
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
 # ============================================================
 # GLOBAL UI POLISH
 # ============================================================
 
-st.markdown("""
+CUSTOM_CSS = """
 <style>
+.block-container {padding-top: 1.5rem;}
+
 /* KPI cards */
 div[data-testid="metric-container"] {
     background-color: #F8F9FA;
@@ -74,134 +92,429 @@ div[data-testid="metric-container"] {
     margin-bottom: 10px;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# One style element per run; it must be re-emitted on every rerun or
+# Streamlit removes it from the page
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # ------------------------------------------------------------
 #  DATABASE LOADER (from db_loader.py)
 # ------------------------------------------------------------
-from db_loader import ensure_database
+from db_loader import ensure_database, database_version
 
+# Called outside any cached function: ensure_database() shows download
+# banners, and Streamlit would replay elements created inside a cached
+# function on every cache hit. It throttles its own release check to once
+# per process per RELEASE_CHECK_INTERVAL, so reruns don't wait on it.
 DB_PATH = ensure_database()
-con = duckdb.connect(DB_PATH, read_only=True)
+
+# Changes when a download replaces workforce.db. Every cache derived from
+# the database is keyed on it (max_entries=1 drops the old snapshot's),
+# so a refresh is picked up by the next rerun instead of after a restart.
+DB_VERSION = database_version(DB_PATH)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_connection(db_path: str, version: str) -> duckdb.DuckDBPyConnection:
+    """
+    Opens the workforce database once per snapshot.
+    Reruns reuse the same connection instead of re-opening the DuckDB file.
+    """
+    db = duckdb.connect(db_path, read_only=True)
+
+    # Use every core for the vectorized GROUP BY scans and keep parsed
+    # metadata cached between queries
+    db.execute(f"PRAGMA threads={os.cpu_count() or 1}")
+    db.execute("PRAGMA memory_limit='2GB'")
+    db.execute("PRAGMA enable_object_cache")
+    return db
+
+con = get_connection(DB_PATH, DB_VERSION)
 
 # ------------------------------------------------------------
 #  SQL RUNNER
 # ------------------------------------------------------------
-def run_sql(sql: str) -> pd.DataFrame:
+CURSOR_POOL_SIZE = 4
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _cursor_pool(version: str) -> queue.Queue:
+    # A DuckDB connection must not be shared between threads; each cursor
+    # is an independent connection to the same database instance.
+    pool = queue.Queue(maxsize=CURSOR_POOL_SIZE)
+    for _ in range(CURSOR_POOL_SIZE):
+        pool.put(con.cursor())
+    return pool
+
+@contextmanager
+def db_cursor():
+    pool = _cursor_pool(DB_VERSION)
+    cur = pool.get()
     try:
-        return con.execute(sql).fetchdf()
+        yield cur
+    finally:
+        pool.put(cur)
+
+def _qi(name: str) -> str:
+    # Quoted SQL identifier, for table/column names passed in as arguments
+    return '"' + name.replace('"', '""') + '"'
+
+# Results are memoized on the query text and DB_VERSION; errors are not cached.
+@st.cache_data(ttl=600, show_spinner=False)
+def _query(sql: str, params: tuple = (), version: str = "") -> pd.DataFrame:
+    with db_cursor() as cur:
+        return cur.execute(sql, list(params)).fetchdf()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _query_large(sql: str, params: tuple = (), version: str = "") -> pd.DataFrame:
+    # Unbounded table pulls: go through Arrow and release its buffers
+    # while converting, so peak memory is roughly one copy of the table.
+    with db_cursor() as cur:
+        tbl = cur.execute(sql, list(params)).fetch_arrow_table()
+    return tbl.to_pandas(split_blocks=True, self_destruct=True)
+
+def run_sql(sql: str, params: tuple = ()) -> pd.DataFrame:
+    try:
+        return _query(sql, params, DB_VERSION)
     except Exception as e:
         st.error(f"SQL Error: {e}")
         return pd.DataFrame()
 
-# ------------------------------------------------------------
-#  FORMATTERS
-# ------------------------------------------------------------
-def fmt_ci(value: Any) -> str:
+def run_sql_large(sql: str) -> pd.DataFrame:
     try:
-        v = float(value)
-        return f"CI${v:,.0f}"
-    except:
-        return value
+        return _query_large(sql, (), DB_VERSION)
+    except Exception as e:
+        st.error(f"SQL Error: {e}")
+        return pd.DataFrame()
 
-def fmt_ci_dec(value: Any) -> str:
-    try:
-        v = float(value)
-        return f"CI${v:,.2f}"
-    except:
-        return value
+@st.cache_data(ttl=600, show_spinner=False)
+def _query_arrow(sql: str, params: tuple = (), version: str = "") -> pa.Table:
+    with db_cursor() as cur:
+        return cur.execute(sql, list(params)).fetch_arrow_table()
 
-def fmt_int(value: Any) -> str:
+def run_sql_arrow(sql: str, params: tuple = ()) -> pa.Table:
+    # For display-only results: st.dataframe renders Arrow directly,
+    # so there is no pandas conversion at all
+    try:
+        return _query_arrow(sql, params, DB_VERSION)
+    except Exception as e:
+        st.error(f"SQL Error: {e}")
+        return pa.table({})
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _query_rows(sql: str, params: tuple = (), version: str = "") -> tuple:
+    with db_cursor() as cur:
+        rows = cur.execute(sql, list(params)).fetchall()
+        columns = [d[0] for d in cur.description]
+    return columns, rows
+
+def run_sql_tsv(sql: str, params: tuple = ()) -> str:
+    # For LLM context samples: the rows only ever become prompt text, so
+    # format DuckDB's plain tuples as TSV (capped at SAMPLE_TOKENS) and
+    # never build a DataFrame. Returns "" when the query fails or matches nothing.
     try:
-        return f"{int(value):,}"
-    except:
-        return value
+        columns, rows = _query_rows(sql, params, DB_VERSION)
+    except Exception as e:
+        st.error(f"SQL Error: {e}")
+        return ""
+    if not rows:
+        return ""
+    buf = io.StringIO()
+    writer = csv.writer(buf, delimiter="\t", lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(rows[:max_sample_rows(len(columns), SAMPLE_TOKENS)])
+    return truncate_rows(buf.getvalue(), SAMPLE_TOKENS)
+
+def arrow_query(sql: str, params: tuple = ()) -> tuple:
+    # Marks a run_sql_many query whose result is only displayed or charted:
+    # it comes back as a pa.Table, like run_sql_arrow
+    return sql, params, True
+
+@st.cache_resource(show_spinner=False)
+def _query_executor() -> ThreadPoolExecutor:
+    # One worker per pooled cursor, shared by every session and rerun
+    return ThreadPoolExecutor(max_workers=CURSOR_POOL_SIZE, thread_name_prefix="duckdb-query")
+
+def _run_in_ctx(ctx, fetch, *args):
+    # Workers are shared between sessions, so each task attaches the
+    # submitting script run's context (cache_data needs it) before running
+    add_script_run_ctx(threading.current_thread(), ctx)
+    return fetch(*args)
+
+def run_sql_many(*queries, large: bool = False) -> list:
+    """
+    Runs independent queries concurrently on pooled cursors, so a page's
+    first render waits for the slowest query rather than the sum of all.
+    Each query is SQL text, an (sql, params) pair, or an arrow_query();
+    large=True uses the run_sql_large path for the DataFrame queries.
+    Errors are reported from the script thread, like run_sql.
+    """
+    default_fetch = _query_large if large else _query
+    specs = []
+    for q in queries:
+        sql, params, *as_arrow = (q, ()) if isinstance(q, str) else q
+        specs.append((sql, params, bool(as_arrow)))
+
+    ctx = get_script_run_ctx()
+    pool = _query_executor()
+    futures = []
+    for sql, params, as_arrow in specs:
+        fetch = _query_arrow if as_arrow else default_fetch
+        futures.append(pool.submit(_run_in_ctx, ctx, fetch, sql, params, DB_VERSION))
+
+    results = []
+    for future, (_, _, as_arrow) in zip(futures, specs):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            st.error(f"SQL Error: {e}")
+            results.append(pa.table({}) if as_arrow else pd.DataFrame())
+    return results
+
+# ------------------------------------------------------------
+#  SCHEMA METADATA (static for the life of a database snapshot)
+# ------------------------------------------------------------
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_schema(version: str) -> dict:
+    # Every table's columns and types from one catalog query:
+    # {table (lowercase): ((column, data_type), ...)}
+    with db_cursor() as cur:
+        rows = cur.execute("""
+            SELECT lower(table_name), column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+            ORDER BY table_name, ordinal_position
+        """).fetchall()
+    schema = {}
+    for table, column, data_type in rows:
+        schema.setdefault(table, []).append((column, data_type))
+    return {table: tuple(cols) for table, cols in schema.items()}
+
+def table_exists(name: str) -> bool:
+    return name.lower() in get_schema(DB_VERSION)
+
+def column_types(name: str) -> dict:
+    return dict(get_schema(DB_VERSION).get(name.lower(), ()))
+
+NUMERIC_TYPES = frozenset({
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT",
+    "FLOAT", "DOUBLE", "DECIMAL",
+})
+
+def is_numeric_type(data_type: str) -> bool:
+    # DECIMAL(18,3) -> DECIMAL
+    return data_type.split("(")[0].upper() in NUMERIC_TYPES
+
+# ------------------------------------------------------------
+#  FORMATTERS (shared with analytics_response.py)
+# ------------------------------------------------------------
+from formatting import fmt_ci_dec, fmt_int
+
+# ------------------------------------------------------------
+#  PROMPT TEXT (token budgets, shared with analytics_response.py)
+# ------------------------------------------------------------
+from prompt_text import SAMPLE_TOKENS, frame_tsv, max_sample_rows, truncate_rows, truncate_tokens
 
 # ============================================================
-# OPENAI CLIENT INITIALIZATION
+# GPT HELPERS
 # ============================================================
-from openai import OpenAI
+MODEL = "gpt-4o-mini"
 
-if "OPENAI_API_KEY" in st.secrets:
-    client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-else:
-    st.error("Missing OPENAI_API_KEY in Streamlit secrets.")
-    st.stop()
+# Cheaper tier, chosen explicitly (model=MODEL_LIGHT) by call sites with
+# fixed, short classification/lookup prompts. Executive summaries always
+# use MODEL, whatever the size of their data sample.
+MODEL_LIGHT = "gpt-4.1-nano"
 
-MODEL = "gpt-4o-mini"
+# Token budgets for long text contexts (SPS document)
+SPS_SUMMARY_TOKENS = 4000
+SPS_QA_TOKENS = 8000
+
+GPT_SYSTEM_PROMPT = (
+    "You are an expert Cayman Islands labor market analyst. "
+    "Be concise, factual, and always base your answer strictly "
+    "on the data provided. Never hallucinate missing values."
+)
 
-def ask_gpt(prompt, model="gpt-4o-mini"):
+GPT_TEMPERATURE = 0.2       # stable, deterministic output
+GPT_CACHE_SIZE = 256        # completions kept per process
+GPT_CACHE_TTL = 60 * 60     # seconds
+
+@st.cache_resource(show_spinner=False)
+def _gpt_cache():
+    # Shared by every session in this process: (lock, LRU of key -> (time, text))
+    return threading.Lock(), OrderedDict()
+
+def _gpt_cache_key(prompt: str, model: str) -> str:
+    # Whitespace-normalised so re-indented or re-spaced prompts still hit;
+    # DB_VERSION keeps answers from a replaced snapshot out
+    normalized = " ".join(prompt.split())
+    payload = json.dumps([DB_VERSION, model, GPT_TEMPERATURE, GPT_SYSTEM_PROMPT, normalized])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _gpt_cache_get(key: str) -> Optional[str]:
+    lock, entries = _gpt_cache()
+    with lock:
+        hit = entries.get(key)
+        if hit is None:
+            return None
+        if time.time() - hit[0] > GPT_CACHE_TTL:
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return hit[1]
+
+def _gpt_cache_put(key: str, text: str):
+    lock, entries = _gpt_cache()
+    with lock:
+        entries[key] = (time.time(), text)
+        entries.move_to_end(key)
+        while len(entries) > GPT_CACHE_SIZE:
+            entries.popitem(last=False)
+
+def _gpt_messages(prompt):
+    return [
+        {"role": "system", "content": GPT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+def ask_gpt(prompt, model=None):
     """
     Safe, reliable GPT wrapper for the Workforce Intelligence Assistant.
     Works with all 'Ask AI' sections across the app.
+    Identical (model, prompt) pairs are answered from the completion cache.
+    With no explicit model, MODEL is used.
     """
 
+    model = model or MODEL
+    key = _gpt_cache_key(prompt, model)
+    cached = _gpt_cache_get(key)
+    if cached is not None:
+        return cached
+
     try:
         response = client.chat.completions.create(
             model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert Cayman Islands labor market analyst. "
-                        "Be concise, factual, and always base your answer strictly "
-                        "on the data provided. Never hallucinate missing values."
-                    )
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2  # stable, deterministic output
+            messages=_gpt_messages(prompt),
+            temperature=GPT_TEMPERATURE,
         )
 
         # FIXED: Extract the text safely
-        return response.choices[0].message.content.strip()
+        text = response.choices[0].message.content.strip()
+        _gpt_cache_put(key, text)
+        return text
 
     except Exception as e:
         return f"GPT Error: {str(e)}"
 
-# ============================================================
-# SECTION-SPECIFIC AI ANALYSIS WRAPPER
-# ============================================================
-def ask_ai_section(prompt, data_sample, role_prompt):
-    full_prompt = f"""
-ROLE:
-{role_prompt}
+def stream_gpt(prompt, model=None):
+    """
+    Streaming variant of ask_gpt: yields text as tokens arrive.
+    Cache hits yield the stored answer at once; a completed stream is cached.
+    """
 
-USER QUESTION:
-{prompt}
+    model = model or MODEL
+    key = _gpt_cache_key(prompt, model)
+    cached = _gpt_cache_get(key)
+    if cached is not None:
+        yield cached
+        return
 
-DATA SAMPLE (USE ONLY THIS):
-{data_sample.to_string(index=False)}
+    parts = []
+    try:
+        stream = client.chat.completions.create(
+            model=model,
+            messages=_gpt_messages(prompt),
+            temperature=GPT_TEMPERATURE,
+            stream=True,
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        yield f"GPT Error: {str(e)}"
+        return
+
+    _gpt_cache_put(key, "".join(parts).strip())
 
+# ============================================================
+# SECTION-SPECIFIC AI ANALYSIS WRAPPER
+# ============================================================
+SECTION_INSTRUCTIONS = """
 INSTRUCTIONS:
-- Base your answer strictly on the dataset above.
+- Base your answer strictly on the data sample below.
 - Do not use outside knowledge unless unavoidable.
 - Be concise, factual, and Cayman-focused.
 - Never hallucinate missing data.
 - Identify patterns, trends, or anomalies only if visible.
 """.strip()
 
-    return ask_gpt(full_prompt)
+def section_prompt(prompt, data_sample, role_prompt):
+    # data_sample is TSV text (see run_sql_tsv / frame_tsv)
+    # Static role + instructions first and the question last, so repeated
+    # calls share a byte-identical prefix for OpenAI's prompt caching
+    return f"""
+ROLE:
+{role_prompt.strip()}
+
+{SECTION_INSTRUCTIONS}
+
+DATA SAMPLE (USE ONLY THIS):
+{data_sample}
+
+USER QUESTION:
+{prompt}
+""".strip()
+
+def ask_ai_section(prompt, data_sample, role_prompt):
+    return ask_gpt(section_prompt(prompt, data_sample, role_prompt))
 
 # ------------------------------------------------------------
 #  REUSABLE CHART BUILDERS
 # ------------------------------------------------------------
 def line_chart(df: pd.DataFrame, x: str, y: str, title: str):
+    if pd.api.types.is_datetime64_any_dtype(df[x]):
+        # Time series: Streamlit's native Vega-Lite chart ships just the
+        # two columns instead of a full Plotly figure spec + plotly.js
+        st.markdown(f"**{title}**")
+        st.line_chart(df, x=x, y=y, height=400)
+        return
+    # Anything else (e.g. an integer year) keeps Plotly's category-style
+    # ticks and markers
     fig = px.line(df, x=x, y=y, markers=True)
     fig.update_layout(title=title, height=400)
     st.plotly_chart(fig, use_container_width=True)
 
-def bar_chart(df: pd.DataFrame, x: str, y: str, title: str):
-    fig = px.bar(df, x=x, y=y)
-    fig.update_layout(title=title, height=400)
-    st.plotly_chart(fig, use_container_width=True)
+# Shared bar-chart layout, built once; each figure copies it and adds a
+# single trace instead of going through Plotly Express's figure factory
+BAR_LAYOUT = go.Layout(height=400)
+
+def bar_fig(df, x: str, y: str, title: str):
+    # Arrow results feed Plotly as NumPy columns, no DataFrame built
+    if isinstance(df, pa.Table):
+        xs, ys = df.column(x).to_numpy(), df.column(y).to_numpy()
+    else:
+        xs, ys = df[x].to_numpy(), df[y].to_numpy()
+    fig = go.Figure(go.Bar(x=xs, y=ys), layout=BAR_LAYOUT)
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+def bar_chart(df, x: str, y: str, title: str):
+    st.plotly_chart(bar_fig(df, x, y, title), use_container_width=True)
 
 # ------------------------------------------------------------
-#  PAGE NAVIGATION
+#  AI OUTPUT
 # ------------------------------------------------------------
-TABS = ["Ask Anything", "Labour Force Survey", "Wages (OWS)", "SPS", "Job Postings Explorer"]
-
-selected_tab = st.sidebar.radio("Navigation", TABS)
+def show_ai_summary(title: str, prompt: str) -> str:
+    # Heading + streamed body share one markdown element, redrawn as
+    # tokens arrive so the answer starts showing at the first token
+    box = st.empty()
+    text = ""
+    for part in stream_gpt(prompt):
+        text += part
+        box.markdown(f"### {title}\n\n{text}")
+    return text
 
 # ------------------------------------------------------------
 #  SHARED DATA REFERENCES
@@ -214,12 +527,146 @@ TABLE_LFS_OCC = "fact_lfs_occupation"  # may not exist
 TABLE_WAGES = "fact_wages_2023"
 TABLE_SPS = "fact_sps_text"
 
-# Placeholder — next steps will define a function for each tab.
+# Job Postings Explorer columns (salary_avg derived from the posted range)
+POSTING_COLUMNS = """
+    posting_date_clean,
+    employer_name,
+    job_title,
+    industry,
+    industry_vertical,
+    salary_min,
+    salary_max,
+    (salary_min + salary_max)/2 AS salary_avg,
+    experience_bucket,
+    fixed_is_tech_job
+"""
+
+# ============================================================
+# AI ROLE PROMPT FOR JOB POSTINGS EXPLORER
+# ============================================================
+JOB_EXPLORER_PROMPT = """
+You are a Cayman workforce intelligence analyst with more than 20 years 
+of experience studying hiring patterns, job postings, employer movement, 
+skill demand, and sector-level labor dynamics in the Cayman Islands. 
+You have produced workforce insights for WORC, the Ministry of Labour, 
+and multiple C-Suite audiences.
+
+Your expertise includes:
+- Cayman labor market structure
+- ICT job classification and tech hiring trends
+- Wage patterns and salary clustering by sector
+- Caymanian vs non-Caymanian hiring behavior
+- Seasonal hiring cycles in Cayman
+- Employer and industry demand patterns
+- Senior, mid, and entry-level segmentation
+
+Answer with precision, data discipline, and relevance to the filtered dataset.
+"""
+
+# ============================================================
+# AI ROLE PROMPT FOR ICT ANALYSIS
+# ============================================================
+ICT_PROMPT = """
+You are a Cayman Islands ICT labor market specialist with deep expertise 
+in analyzing technology job postings, skill trends, employer hiring patterns, 
+and year-over-year ICT demand. You understand ICT classification rules in the 
+Cayman context and are fluent in WORC reporting needs.
+
+Your expertise includes:
+- ICT job classification (software, IT, data, engineering, cyber, cloud)
+- Tech sector hiring patterns and employer behavior
+- Entry (1–2 yrs), Mid (3–4 yrs), Senior (5+ yrs) segmentation
+- Year-over-year (Oct to Oct) ICT job movement
+- Salary patterns and skill signals in tech jobs
+- Sector-level ICT demand (Finance, Tech, Public Sector, etc.)
+
+All insights must be based ONLY on the ICT subset provided.
+Answer with clarity, precision, and executive-grade relevance.
+"""
+
+WAGE_NUMERIC_COLS = ["employee_count", "mean", "p10", "p25", "median"]
+
+from routing import is_tech_question, classify_intent
+
+# Ask Anything routes: intent -> (sql, chart type, x, y, chart title).
+# Built once at import; identical SQL text also keeps run_sql cache hits exact.
+ASK_QUERIES = {
+    "top_tech": (f"""
+        SELECT employer_name, COUNT(*) AS tech_roles
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE fixed_is_tech_job = TRUE
+        GROUP BY employer_name
+        ORDER BY tech_roles DESC
+        LIMIT 15
+    """, "bar", "employer_name", "tech_roles", "Top Tech Employers (Recent)"),
+
+    "bottom_tech": (f"""
+        SELECT employer_name, COUNT(*) AS tech_roles
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE fixed_is_tech_job = TRUE
+        GROUP BY employer_name
+        HAVING tech_roles > 0
+        ORDER BY tech_roles ASC
+        LIMIT 15
+    """, "bar", "employer_name", "tech_roles", "Employers With Fewest Tech Roles"),
+
+    "entry_tech": (f"""
+        SELECT job_title, employer_name, salary_avg
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE fixed_is_tech_job = TRUE
+          AND experience_bucket = 'entry'
+        ORDER BY posting_date_clean DESC
+        LIMIT 50
+    """, None, None, None, None),
+
+    "high_salary": (f"""
+        SELECT
+            year,
+            MAX((salary_min + salary_max) / 2) AS max_salary
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
+        GROUP BY year
+        ORDER BY year
+    """, "line", "year", "max_salary", "Highest Tech Salaries by Year"),
+
+    "low_salary": (f"""
+        SELECT
+            year,
+            MIN((salary_min + salary_max) / 2) AS min_salary
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
+        GROUP BY year
+        ORDER BY year
+    """, "line", "year", "min_salary", "Lowest Tech Salaries by Year"),
+
+    "avg_salary": (f"""
+        SELECT
+            year,
+            AVG((salary_min + salary_max) / 2) AS avg_salary
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
+        GROUP BY year
+        ORDER BY year
+    """, "line", "year", "avg_salary", "Average Tech Salaries by Year"),
+
+    "salary_trend": (f"""
+        SELECT year_month, AVG(salary_avg) AS avg_salary
+        FROM {TABLE_JOB_POSTINGS}
+        GROUP BY year_month
+        ORDER BY year_month
+    """, "line", "year_month", "avg_salary", "Salary Trend Over Time"),
+
+    "general": (
+        f"SELECT * FROM {TABLE_JOB_POSTINGS} ORDER BY posting_date_clean DESC LIMIT 50",
+        None, None, None, None,
+    ),
+}
+
 # ============================================================
 # FIXED — ASK ANYTHING (Postings + Analyst Queries)
 # ============================================================
 
-if selected_tab == "Ask Anything":
+def render_ask_anything():
 
     st.title("Ask Anything")
 
@@ -234,18 +681,7 @@ if selected_tab == "Ask Anything":
     # ------------------------
     # INTENT DETECTION
     # ------------------------
-    def classify(q):
-        ql = q.lower()
-        if "most tech" in ql: return "top_tech"
-        if "least tech" in ql: return "bottom_tech"
-        if "entry" in ql and "tech" in ql: return "entry_tech"
-        if "highest" in ql and "salary" in ql: return "high_salary"
-        if "lowest" in ql and "salary" in ql: return "low_salary"
-        if "average" in ql and "salary" in ql: return "avg_salary"
-        if "trend" in ql and "salary" in ql: return "salary_trend"
-        return "general"
-
-    intent = classify(user_q)
+    intent = classify_intent(user_q)
 
     # ------------------------
     # QUERY HELPERS
@@ -256,138 +692,42 @@ if selected_tab == "Ask Anything":
             bar_chart(df, x, y, title)
         if chart_type == "line":
             line_chart(df, x, y, title)
-        summary = ask_gpt(f"User question: {user_q}\nData:\n{df.to_string()}\nProvide an executive summary.")
-        st.markdown("### AI Summary")
-        st.write(summary)
-
-    # ------------------------
-    # INTENT ROUTE: MOST TECH
-    # ------------------------
-    if intent == "top_tech":
-        df = run_sql(f"""
-            SELECT employer_name, COUNT(*) AS tech_roles
-            FROM {TABLE_JOB_POSTINGS}
-            WHERE fixed_is_tech_job = TRUE
-            GROUP BY employer_name
-            ORDER BY tech_roles DESC
-            LIMIT 15
-        """)
-        show_results(df, "bar", "employer_name", "tech_roles", "Top Tech Employers (Recent)")
-
-    # ------------------------
-    # INTENT ROUTE: LEAST TECH
-    # ------------------------
-    elif intent == "bottom_tech":
-        df = run_sql(f"""
-            SELECT employer_name, COUNT(*) AS tech_roles
-            FROM {TABLE_JOB_POSTINGS}
-            WHERE fixed_is_tech_job = TRUE
-            GROUP BY employer_name
-            HAVING tech_roles > 0
-            ORDER BY tech_roles ASC
-            LIMIT 15
-        """)
-        show_results(df, "bar", "employer_name", "tech_roles", "Employers With Fewest Tech Roles")
-
-    # ------------------------
-    # INTENT ROUTE: ENTRY TECH
-    # ------------------------
-    elif intent == "entry_tech":
-        df = run_sql(f"""
-            SELECT job_title, employer_name, salary_avg
-            FROM {TABLE_JOB_POSTINGS}
-            WHERE fixed_is_tech_job = TRUE
-              AND experience_bucket = 'entry'
-            ORDER BY posting_date_clean DESC
-            LIMIT 50
-        """)
-        show_results(df)
-
-    # ------------------------
-    # INTENT ROUTE: HIGHEST SALARY
-    # ------------------------
-    if intent == "high_salary":
-        df = run_sql(f"""
-            SELECT 
-                year,
-                MAX((salary_min + salary_max) / 2) AS max_salary
-            FROM {TABLE_JOB_POSTINGS}
-            WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
-            GROUP BY year
-            ORDER BY year
-        """)
-        show_results(df, "line", "year", "max_salary", "Highest Tech Salaries by Year")
-
-    # ------------------------
-    # INTENT ROUTE: LOWEST SALARY
-    # ------------------------
-    elif intent == "low_salary":
-        df = run_sql(f"""
-            SELECT 
-                year,
-                MIN((salary_min + salary_max) / 2) AS min_salary
-            FROM {TABLE_JOB_POSTINGS}
-            WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
-            GROUP BY year
-            ORDER BY year
-        """)
-        show_results(df, "line", "year", "min_salary", "Lowest Tech Salaries by Year")
-
-    # ------------------------
-    # INTENT ROUTE: AVERAGE SALARY
-    # ------------------------
-    elif intent == "avg_salary":
-        df = run_sql(f"""
-            SELECT 
-                year,
-                AVG((salary_min + salary_max) / 2) AS avg_salary
-            FROM {TABLE_JOB_POSTINGS}
-            WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
-            GROUP BY year
-            ORDER BY year
-        """)
-        show_results(df, "line", "year", "avg_salary", "Average Tech Salaries by Year")
-
-    # ------------------------
-    # INTENT ROUTE: SALARY TREND
-    # ------------------------
-    elif intent == "salary_trend":
-        df = run_sql(f"""
-            SELECT year_month, AVG(salary_avg) AS avg_salary
-            FROM {TABLE_JOB_POSTINGS}
-            GROUP BY year_month
-            ORDER BY year_month
-        """)
-        show_results(df, "line", "year_month", "avg_salary", "Salary Trend Over Time")
+        show_ai_summary(
+            "AI Summary",
+            f"Provide an executive summary of the data below.\n\nData:\n{frame_tsv(df)}\n"
+            f"User question: {user_q}"
+        )
 
     # ------------------------
-    # DEFAULT: GENERAL ROUTE
+    # INTENT ROUTE (falls back to the general route)
     # ------------------------
-    else:
-        df = run_sql(f"SELECT * FROM {TABLE_JOB_POSTINGS} ORDER BY posting_date_clean DESC LIMIT 50")
-        show_results(df)
+    sql, chart_type, x, y, title = ASK_QUERIES.get(intent, ASK_QUERIES["general"])
+    show_results(run_sql(sql), chart_type, x, y, title)
 
 # ============================================================
 # STEP 3 — LABOUR FORCE SURVEY (LFS) TAB
 # ============================================================
 
-if selected_tab == "Labour Force Survey":
+def render_lfs():
 
     st.title("Labour Force Survey — Fall 2024")
 
     # ------------------------------------------------------------
     # LOAD DATA
     # ------------------------------------------------------------
-    df_over = run_sql(f"SELECT * FROM {TABLE_LFS_OVERVIEW}")
-    df_ind = run_sql(f"SELECT * FROM {TABLE_LFS_INDUSTRY}")
+    # The overview is only read as metric/value pairs
+    df_over, df_ind = run_sql_many(
+        f"SELECT metric, value FROM {TABLE_LFS_OVERVIEW}",
+        f"SELECT * FROM {TABLE_LFS_INDUSTRY}",
+        large=True,
+    )
 
     # Some LFS TXT files may not include occupation data
-    try:
-        df_occ = run_sql(f"SELECT * FROM {TABLE_LFS_OCC}")
-        has_occ = not df_occ.empty
-    except:
+    if table_exists(TABLE_LFS_OCC):
+        df_occ = run_sql_large(f"SELECT * FROM {TABLE_LFS_OCC}")
+    else:
         df_occ = pd.DataFrame()
-        has_occ = False
+    has_occ = not df_occ.empty
 
     # ------------------------------------------------------------
     # KPI SECTION (Overview)
@@ -426,11 +766,11 @@ if selected_tab == "Labour Force Survey":
     else:
         df_ind["employment"] = df_ind["employment"].astype(float)
 
+        # Charted from the frame already loaded for the table below (no
+        # second query); the figure is built per run, never shared
         bar_chart(
             df_ind.sort_values("employment", ascending=False),
-            "industry",
-            "employment",
-            "Employment by Industry"
+            "industry", "employment", "Employment by Industry",
         )
 
         st.dataframe(df_ind)
@@ -446,10 +786,8 @@ if selected_tab == "Labour Force Survey":
         df_occ["employment"] = df_occ["employment"].astype(float)
 
         bar_chart(
-            df_occ.sort_values("employment", ascending=False).head(20),
-            "occupation",
-            "employment",
-            "Top 20 Occupations by Employment"
+            df_occ.nlargest(20, "employment"),
+            "occupation", "employment", "Top 20 Occupations by Employment",
         )
 
         st.dataframe(df_occ)
@@ -464,39 +802,42 @@ if selected_tab == "Labour Force Survey":
     if st.button("Generate AI Summary"):
         sample_text = f"""
         LFS Overview:
-        {df_over.head().to_string(index=False)}
+        {frame_tsv(df_over.head())}
 
         Industry Employment:
-        {df_ind.head(10).to_string(index=False)}
+        {frame_tsv(df_ind.head(10))}
         """
 
-        summary = ask_gpt(
+        show_ai_summary(
+            "AI Summary",
             "Provide an accurate, concise, executive-level summary "
             "of Cayman’s Labour Force using ONLY the data below:\n\n"
             + sample_text
         )
-
-        st.markdown("### AI Summary")
-        st.write(summary)
 # ============================================================
 # STEP 4 — WAGES (OWS) TAB
 # ============================================================
 
-if selected_tab == "Wages (OWS)":
+def render_wages():
 
     st.title("Occupational Wage Survey — 2023")
 
     # ------------------------------------------------------------
     # LOAD WAGE DATA
     # ------------------------------------------------------------
-    df_wage = run_sql(f"SELECT * FROM {TABLE_WAGES}")
+    df_wage = run_sql_large(f"SELECT * FROM {TABLE_WAGES}")
 
     if df_wage.empty:
         st.error("No wage data found.")
         st.stop()
 
-    # Clean numeric fields
-    for col in ["employee_count", "mean", "p10", "p25", "median"]:
+    # Clean numeric fields: only those not already stored as numbers
+    wage_types = column_types(TABLE_WAGES)
+    wage_numeric = [
+        c for c in WAGE_NUMERIC_COLS
+        if c in wage_types and not is_numeric_type(wage_types[c])
+    ]
+    for col in wage_numeric:
         df_wage[col] = pd.to_numeric(df_wage[col], errors="coerce")
 
     # ------------------------------------------------------------
@@ -517,7 +858,14 @@ if selected_tab == "Wages (OWS)":
     # ------------------------------------------------------------
     st.subheader("Top Paying Occupations (By Mean Salary)")
 
-    top_mean = df_wage.sort_values("mean", ascending=False).head(15)
+    top_mean = run_sql(f"""
+        SELECT *
+        FROM {TABLE_WAGES}
+        ORDER BY TRY_CAST("mean" AS DOUBLE) DESC NULLS LAST
+        LIMIT 15
+    """)
+    for col in wage_numeric:
+        top_mean[col] = pd.to_numeric(top_mean[col], errors="coerce")
     st.dataframe(top_mean)
 
     bar_chart(top_mean, "occupation", "mean", "Top Paying Occupations — Mean Salary")
@@ -564,30 +912,39 @@ if selected_tab == "Wages (OWS)":
             "You are analyzing Cayman’s Occupational Wage Survey (2023). "
             "Using ONLY the following wage data (occupations + wage distribution metrics), "
             "write a precise, executive-level summary suitable for senior leadership.\n\n"
-            + sample.to_string()
+            + frame_tsv(sample)
         )
 
-        summary = ask_gpt(prompt)
-
-        st.markdown("### AI Summary (Wages)")
-        st.write(summary)
+        show_ai_summary("AI Summary (Wages)", prompt)
 # ============================================================
 # STEP 5 — SPS TAB (Strategic Policy Statement 2025)
 # ============================================================
 
-if selected_tab == "SPS":
+def render_sps():
 
     st.title("Strategic Policy Statement (2025)")
 
     # ------------------------------------------------------------
     # LOAD SPS TEXT DATA
     # ------------------------------------------------------------
-    df_sps = run_sql(f"SELECT * FROM {TABLE_SPS}")
-
-    if df_sps.empty:
+    # Rows are only pulled by the viewer and AI sections, each with a LIMIT
+    if run_sql_arrow(f"SELECT 1 FROM {TABLE_SPS} LIMIT 1").num_rows == 0:
         st.error("No SPS text data found.")
         st.stop()
 
+    # First `limit` SPS rows joined by DuckDB, so one string crosses into
+    # Python, then trimmed to the prompt's token budget. Rows are picked and
+    # joined in document (rowid) order; a parallel scan otherwise may vary
+    # both between runs, scrambling the text and the completion cache key.
+    def sps_text(limit, max_tokens):
+        df = run_sql(f"""
+            SELECT string_agg(content, chr(10) ORDER BY rn) AS text
+            FROM (SELECT rowid AS rn, content FROM {TABLE_SPS} ORDER BY rowid LIMIT ?)
+        """, (int(limit),))
+        if df.empty or pd.isna(df["text"].iloc[0]):
+            return ""
+        return truncate_tokens(df["text"].iloc[0], max_tokens)
+
     st.markdown("### SPS Document Viewer")
 
     # ------------------------------------------------------------
@@ -599,11 +956,14 @@ if selected_tab == "SPS":
     )
 
     if keyword:
-        df_filtered = df_sps[df_sps["content"].str.contains(keyword, case=False, na=False)]
-        st.write(f"**Matches:** {len(df_filtered)}")
-        st.dataframe(df_filtered)
+        matches = run_sql_arrow(
+            f"SELECT * FROM {TABLE_SPS} WHERE contains(lower(content), lower(?))",
+            (keyword,),
+        )
+        st.write(f"**Matches:** {matches.num_rows}")
+        st.dataframe(matches)
     else:
-        st.dataframe(df_sps.head(50))
+        st.dataframe(run_sql_arrow(f"SELECT * FROM {TABLE_SPS} ORDER BY rowid LIMIT 50"))
 
     st.markdown("---")
 
@@ -613,7 +973,7 @@ if selected_tab == "SPS":
     st.subheader("AI Summary")
 
     if st.button("Generate SPS Executive Summary"):
-        sample_text = "\n".join(df_sps['content'].head(100).tolist())
+        sample_text = sps_text(100, SPS_SUMMARY_TOKENS)
 
         prompt = (
             "You are summarizing Cayman’s Strategic Policy Statement (2025). "
@@ -622,10 +982,7 @@ if selected_tab == "SPS":
             + sample_text
         )
 
-        summary = ask_gpt(prompt)
-
-        st.markdown("### Executive Summary")
-        st.write(summary)
+        show_ai_summary("Executive Summary", prompt)
 
     st.markdown("---")
 
@@ -641,50 +998,25 @@ if selected_tab == "SPS":
 
     if user_sps_q:
         # Provide GPT only with real SPS text to avoid hallucinations
-        context = "\n".join(df_sps['content'].head(300).tolist())
+        context = sps_text(300, SPS_QA_TOKENS)
 
         prompt = (
-            f"User question: {user_sps_q}\n\n"
             "Use ONLY the SPS 2025 text below. "
             "Do NOT invent information. Only answer using real content.\n\n"
             + context
+            + f"\n\nUser question: {user_sps_q}"
         )
 
-        answer = ask_gpt(prompt)
-
-        st.markdown("### SPS Answer")
-        st.write(answer)
+        show_ai_summary("SPS Answer", prompt)
 # ============================================================
 # JOB POSTINGS EXPLORER — ENHANCED ICT + WORKFORCE DASHBOARD
 # ============================================================
 
-if selected_tab == "Job Postings Explorer":
+def render_job_postings():
     
     st.title("Job Postings Explorer")
     st.write("")  # spacing
    
-    # ============================================================
-    # AI ROLE PROMPT FOR JOB POSTINGS EXPLORER
-    # ============================================================
-    JOB_EXPLORER_PROMPT = """
-You are a Cayman workforce intelligence analyst with more than 20 years 
-of experience studying hiring patterns, job postings, employer movement, 
-skill demand, and sector-level labor dynamics in the Cayman Islands. 
-You have produced workforce insights for WORC, the Ministry of Labour, 
-and multiple C-Suite audiences.
-
-Your expertise includes:
-- Cayman labor market structure
-- ICT job classification and tech hiring trends
-- Wage patterns and salary clustering by sector
-- Caymanian vs non-Caymanian hiring behavior
-- Seasonal hiring cycles in Cayman
-- Employer and industry demand patterns
-- Senior, mid, and entry-level segmentation
-
-Answer with precision, data discipline, and relevance to the filtered dataset.
-"""
-
     # ===========================
     # HOW TO USE (EXPANDER) — FIXED
     # ===========================
@@ -725,26 +1057,16 @@ Ask any question in natural language — AI will summarize the trends based only
 ---
         """)
 
-    # Load data
+    # Load data (unordered: only the bounded detail queries below need a sort)
     df = run_sql(f"""
-        SELECT 
-            posting_date_clean,
-            employer_name,
-            job_title,
-            industry,
-            industry_vertical,
-            salary_min,
-            salary_max,
-            (salary_min + salary_max)/2 AS salary_avg,
-            experience_bucket,
-            fixed_is_tech_job
+        SELECT {POSTING_COLUMNS}
         FROM {TABLE_JOB_POSTINGS}
         WHERE posting_date_clean IS NOT NULL
-        ORDER BY posting_date_clean DESC
     """)
 
-    df["posting_date_clean"] = pd.to_datetime(df["posting_date_clean"])
-    df["year_month"] = df["posting_date_clean"].dt.to_period("M").astype(str)
+    # DuckDB already returns DATE columns as datetime64; parse only if not
+    if not pd.api.types.is_datetime64_any_dtype(df["posting_date_clean"]):
+        df["posting_date_clean"] = pd.to_datetime(df["posting_date_clean"])
 
     # ===========================
     # TIME RANGE FILTER
@@ -757,15 +1079,16 @@ Ask any question in natural language — AI will summarize the trends based only
     )
 
     today = df["posting_date_clean"].max()
+    range_days = {
+        "Last 30 days": 30,
+        "Last 90 days": 90,
+        "Last 180 days": 180,
+        "Last 12 months": 365,
+    }.get(range_choice)
 
-    if range_choice == "Last 30 days":
-        df = df[df["posting_date_clean"] >= today - pd.Timedelta(days=30)]
-    elif range_choice == "Last 90 days":
-        df = df[df["posting_date_clean"] >= today - pd.Timedelta(days=90)]
-    elif range_choice == "Last 180 days":
-        df = df[df["posting_date_clean"] >= today - pd.Timedelta(days=180)]
-    elif range_choice == "Last 12 months":
-        df = df[df["posting_date_clean"] >= today - pd.Timedelta(days=365)]
+    cutoff = today - pd.Timedelta(days=range_days) if range_days else None
+    if cutoff is not None:
+        df = df[df["posting_date_clean"] >= cutoff]
 
     # ===========================
     # FILTERS
@@ -777,68 +1100,131 @@ Ask any question in natural language — AI will summarize the trends based only
         selected_vertical = st.selectbox("Vertical Sector", vertical_opt)
         tech_only = st.selectbox("ICT Roles Only?", ["No", "Yes"])
 
-    filtered = df.copy()
-
+    # One combined mask; with no filters `filtered` is just `df` (no copy)
+    conditions = []
     if selected_industry != "All":
-        filtered = filtered[filtered["industry"] == selected_industry]
-
+        conditions.append(df["industry"].values == selected_industry)
     if selected_vertical != "All":
-        filtered = filtered[filtered["industry_vertical"] == selected_vertical]
-
+        conditions.append(df["industry_vertical"].values == selected_vertical)
     if tech_only == "Yes":
-        filtered = filtered[filtered["fixed_is_tech_job"] == True]
+        conditions.append(df["fixed_is_tech_job"].values == True)
+
+    filtered = df[np.logical_and.reduce(conditions)] if conditions else df
+
+    # Same filters as a DuckDB predicate, for aggregates computed in SQL
+    def postings_where(industry="All", vertical="All", tech=False):
+        where = ["posting_date_clean IS NOT NULL"]
+        params = []
+        if cutoff is not None:
+            where.append("posting_date_clean >= ?")
+            params.append(cutoff.to_pydatetime())
+        if industry != "All":
+            where.append("industry = ?")
+            params.append(industry)
+        if vertical != "All":
+            where.append("industry_vertical = ?")
+            params.append(vertical)
+        if tech:
+            where.append("fixed_is_tech_job = TRUE")
+        return " AND ".join(where), tuple(params)
+
+    # Top-K per column in DuckDB (bounded heap instead of a pandas groupby
+    # + sort), all columns in one UNION ALL round-trip
+    def top_postings_query(cols, where_sql, params, n=10):
+        branches = [f"""
+            (SELECT '{col}' AS dim, {_qi(col)} AS value, COUNT(*) AS postings
+             FROM {TABLE_JOB_POSTINGS}
+             WHERE {where_sql} AND {_qi(col)} IS NOT NULL
+             GROUP BY {_qi(col)}
+             ORDER BY postings DESC
+             LIMIT ?)
+        """ for col in cols]
+        return " UNION ALL ".join(branches), (params + (int(n),)) * len(cols)
+
+    # Splits a top_postings_query result into {col: DataFrame}
+    def split_tops(df, cols):
+        tops = {}
+        for col in cols:
+            part = df[df["dim"] == col] if not df.empty else df
+            tops[col] = (
+                part.drop(columns="dim", errors="ignore")
+                .rename(columns={"value": col})
+                .reset_index(drop=True)
+            )
+        return tops
+
+    # Most recent postings, sorted with DuckDB's top-K instead of a full sort
+    def latest_postings_query(where_sql, params, n):
+        return f"""
+            SELECT {POSTING_COLUMNS},
+                   strftime(posting_date_clean, '%Y-%m') AS year_month
+            FROM {TABLE_JOB_POSTINGS}
+            WHERE {where_sql}
+            ORDER BY posting_date_clean DESC
+            LIMIT ?
+        """, params + (int(n),)
+
+    where_sql, params = postings_where(selected_industry, selected_vertical, tech_only == "Yes")
+
+    # All four KPIs in one aggregate pass
+    kpi_query = f"""
+        SELECT COUNT(*) AS postings,
+               AVG((salary_min + salary_max) / 2) AS avg_salary,
+               AVG(CAST(fixed_is_tech_job AS INTEGER)) AS ict_share,
+               COUNT(DISTINCT industry) AS industries
+        FROM {TABLE_JOB_POSTINGS}
+        WHERE {where_sql}
+    """, params
+
+    # Group on date_trunc (integer math on the DATE) and format only the
+    # per-month results, instead of building a string for every row
+    trend_query = f"""
+        SELECT strftime(month, '%Y-%m') AS year_month, postings
+        FROM (
+            SELECT date_trunc('month', posting_date_clean) AS month,
+                   COUNT(*) AS postings
+            FROM {TABLE_JOB_POSTINGS}
+            WHERE {where_sql}
+            GROUP BY month
+        )
+        ORDER BY month
+    """, params
+
+    # The page's independent aggregates run concurrently on pooled cursors
+    top_cols = ["employer_name", "job_title"]
+    kpi, latest, df_month, df_tops = run_sql_many(
+        kpi_query,
+        arrow_query(*latest_postings_query(where_sql, params, 300)),
+        arrow_query(*trend_query),
+        top_postings_query(top_cols, where_sql, params),
+    )
+    tops = split_tops(df_tops, top_cols)
 
     # ===========================
     # SUMMARY KPIs
     # ===========================
     st.markdown("<h4 class='section-header'>Summary</h4>", unsafe_allow_html=True)
 
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Postings", f"{len(filtered):,}")
-    col2.metric("Avg Salary", fmt_ci_dec(filtered["salary_avg"].mean()))
-    col3.metric("ICT Role %", f"{(filtered['fixed_is_tech_job'].mean() * 100):.1f}%")
-    col4.metric("Industries", filtered["industry"].nunique())
+    if not kpi.empty:
+        kpi = kpi.iloc[0]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Postings", f"{int(kpi['postings']):,}")
+        col2.metric("Avg Salary", fmt_ci_dec(kpi["avg_salary"]))
+        col3.metric("ICT Role %", f"{(kpi['ict_share'] * 100):.1f}%")
+        col4.metric("Industries", int(kpi["industries"]))
 
     # ===========================
     # DATA TABLE
     # ===========================
-    st.dataframe(filtered.head(300))
+    st.dataframe(latest)
 
     # ===========================
     # TREND CHART — FILTERED
     # ===========================
     st.markdown("<h4 class='section-header'>Posting Trend</h4>", unsafe_allow_html=True)
 
-    df_month = (
-        filtered.groupby("year_month")
-        .size()
-        .reset_index(name="postings")
-        .sort_values("year_month")
-    )
-
-    if not df_month.empty:
+    if df_month.num_rows:
         bar_chart(df_month, "year_month", "postings", "Postings per Month")
-    # ============================================================
-    # AI ROLE PROMPT FOR ICT ANALYSIS
-    # ============================================================
-    ICT_PROMPT = """
-You are a Cayman Islands ICT labor market specialist with deep expertise 
-in analyzing technology job postings, skill trends, employer hiring patterns, 
-and year-over-year ICT demand. You understand ICT classification rules in the 
-Cayman context and are fluent in WORC reporting needs.
-
-Your expertise includes:
-- ICT job classification (software, IT, data, engineering, cyber, cloud)
-- Tech sector hiring patterns and employer behavior
-- Entry (1–2 yrs), Mid (3–4 yrs), Senior (5+ yrs) segmentation
-- Year-over-year (Oct to Oct) ICT job movement
-- Salary patterns and skill signals in tech jobs
-- Sector-level ICT demand (Finance, Tech, Public Sector, etc.)
-
-All insights must be based ONLY on the ICT subset provided.
-Answer with clarity, precision, and executive-grade relevance.
-"""
-    
     # ===========================
     # ICT ANALYSIS (FIXED)
     # ===========================
@@ -864,9 +1250,10 @@ Answer with clarity, precision, and executive-grade relevance.
         (df_ict["posting_date_clean"] < pd.Timestamp("2025-10-01"))
     ]
     
-    entry_count = df_ict_2025[df_ict_2025["experience_bucket"] == "entry"].shape[0]
-    mid_count   = df_ict_2025[df_ict_2025["experience_bucket"] == "mid"].shape[0]
-    senior_count = df_ict_2025[df_ict_2025["experience_bucket"] == "senior"].shape[0]
+    bucket_counts = df_ict_2025["experience_bucket"].value_counts()
+    entry_count = int(bucket_counts.get("entry", 0))
+    mid_count = int(bucket_counts.get("mid", 0))
+    senior_count = int(bucket_counts.get("senior", 0))
     
     col1, col2, col3 = st.columns(3)
     col1.metric("ICT Entry-Level (1–2 yrs)", entry_count)
@@ -878,30 +1265,14 @@ Answer with clarity, precision, and executive-grade relevance.
     # ===========================
     st.markdown("### Top Employers (Filtered)")
     
-    top_emp = (
-        filtered.groupby("employer_name")
-        .size()
-        .reset_index(name="postings")
-        .sort_values("postings", ascending=False)
-        .head(10)
-    )
-    
-    st.dataframe(top_emp)
+    st.dataframe(tops["employer_name"])
 
     # ===========================
     # TOP JOB TITLES (FILTERED)
     # ===========================
     st.markdown("### Top Job Titles (Filtered)")
     
-    top_titles = (
-        filtered.groupby("job_title")
-        .size()
-        .reset_index(name="postings")
-        .sort_values("postings", ascending=False)
-        .head(10)
-    )
-    
-    st.dataframe(top_titles)
+    st.dataframe(tops["job_title"])
 
     # ===========================
     # TOP EMPLOYERS BY SECTOR
@@ -909,18 +1280,16 @@ Answer with clarity, precision, and executive-grade relevance.
     st.markdown("<h4 class='section-header'>Top Employers by Sector</h4>", unsafe_allow_html=True)
 
     selected_sector = st.selectbox("Select Vertical Sector", sorted(df["industry_vertical"].dropna().unique()))
-    df_sec = df[df["industry_vertical"] == selected_sector]
-
-    top_emp = df_sec.groupby("employer_name").size().reset_index(name="postings").sort_values("postings", ascending=False).head(10)
-    st.dataframe(top_emp)
+    sector_where, sector_params = postings_where(vertical=selected_sector)
+    df_sector = run_sql(*top_postings_query(["employer_name"], sector_where, sector_params))
+    st.dataframe(split_tops(df_sector, ["employer_name"])["employer_name"])
 
     # ===========================
     # TOP JOB TITLES
     # ===========================
     st.markdown("<h4 class='section-header'>Top Job Titles</h4>", unsafe_allow_html=True)
 
-    top_titles = filtered.groupby("job_title").size().reset_index(name="postings").sort_values("postings", ascending=False).head(10)
-    st.dataframe(top_titles)
+    st.dataframe(tops["job_title"])
 
     # ===========================
     # SALARY DISTRIBUTION (LOG SCALE — BEST PRACTICE)
@@ -964,29 +1333,34 @@ Answer with clarity, precision, and executive-grade relevance.
     if user_q:
 
         # --- INTENT DETECTION: Should AI restrict to ICT roles? ---
-        q = user_q.lower()
-        tech_terms = ["tech", "ict", "it ", "it job", "technology", "software",
-                      "developer", "computer", "engineer", "cyber"]
-
         # If user is asking about ICT, force ICT subset
-        if any(t in q for t in tech_terms):
-            ai_df = filtered[filtered["fixed_is_tech_job"] == True]
-        else:
-            ai_df = filtered
+        ask_tech = tech_only == "Yes" or is_tech_question(user_q)
+        sample = run_sql_tsv(*latest_postings_query(
+            *postings_where(selected_industry, selected_vertical, ask_tech), 100
+        ))
 
         # Protect against empty ICT datasets
-        if ai_df.empty:
+        if not sample:
             st.warning("No matching job postings found in this timeframe for your question.")
-        sample = ai_df.head(100)
 
         # --- CALL THE SECTION-SPECIFIC ANALYST ---
-        ai_response = ask_ai_section(
-            user_q,
-            sample,
-            JOB_EXPLORER_PROMPT
+        show_ai_summary(
+            "Executive Summary",
+            section_prompt(user_q, sample, JOB_EXPLORER_PROMPT),
         )
 
-        st.markdown("### Executive Summary")
-        st.write(ai_response)
 
-   
+# ------------------------------------------------------------
+#  PAGE NAVIGATION
+#  Only the selected page's render function runs on each rerun.
+# ------------------------------------------------------------
+PAGES = {
+    "Ask Anything": render_ask_anything,
+    "Labour Force Survey": render_lfs,
+    "Wages (OWS)": render_wages,
+    "SPS": render_sps,
+    "Job Postings Explorer": render_job_postings,
+}
+
+selected_tab = st.sidebar.radio("Navigation", list(PAGES))
+PAGES[selected_tab]()
@@ -1,19 +1,184 @@
 import os
+import time
+import hashlib
+import threading
 import requests
 import streamlit as st
 from pathlib import Path
 
+HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/octet-stream",
+}
+
+# (connect, read) seconds: a stalled server fails the download instead of
+# hanging the script thread
+DOWNLOAD_TIMEOUT = (10, 60)
+
+# Seconds between release (ETag) checks. db_loader is imported once per
+# process, so this state is shared by every session, unlike app.py's
+# globals which are rebuilt on each rerun.
+RELEASE_CHECK_INTERVAL = 600
+_release_lock = threading.Lock()
+_last_release_check = 0.0
+
+# 1 MiB reads: the database is 100 MB+, so 8 KiB chunks meant ~10k+ writes
+CHUNK_SIZE = 1 << 20
+
+def remote_etag(url: str):
+    """
+    ETag of the published database, or None if it can't be determined
+    (offline, or the server doesn't send one).
+    """
+    try:
+        r = requests.head(url, headers=HEADERS, allow_redirects=True, timeout=10)
+        r.raise_for_status()
+    except requests.RequestException:
+        return None
+    return r.headers.get("ETag")
+
+def remote_size(url: str):
+    # Content-Length of the published database, or None
+    try:
+        r = requests.head(url, headers=HEADERS, allow_redirects=True, timeout=10)
+        r.raise_for_status()
+        return int(r.headers["Content-Length"])
+    except (requests.RequestException, KeyError, ValueError):
+        return None
+
+def range_total(content_range):
+    # "bytes */N" (or "bytes a-b/N") -> N; None if absent or "*"
+    try:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total)
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def discard_part(part_path: Path, part_etag_path: Path):
+    for p in (part_path, part_etag_path):
+        if p.exists():
+            p.unlink()
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def download_database(url: str, db_path: Path):
+    """
+    Streams the release into <db>.part and only renames it over db_path once
+    it is complete (and matches DB_SHA256, if that secret is set), so a failed
+    download never leaves a truncated database behind.
+    A .part left by an interrupted run is resumed with an HTTP Range request;
+    If-Range makes the server send the whole file instead if the release changed.
+    Returns the release's ETag, or None.
+    """
+
+    part_path = db_path.with_name(db_path.name + ".part")
+    part_etag_path = db_path.with_name(db_path.name + ".part.etag")
+
+    headers = dict(HEADERS)
+    etag = part_etag_path.read_text() if part_etag_path.exists() else None
+    if part_path.exists() and etag:
+        headers["Range"] = f"bytes={part_path.stat().st_size}-"
+        headers["If-Range"] = etag
+
+    stale_part = False
+    with requests.get(
+        url, stream=True, headers=headers, allow_redirects=True, timeout=DOWNLOAD_TIMEOUT
+    ) as r:
+        if r.status_code == 416:
+            # Nothing left to send: either the .part is exactly the whole
+            # (unchanged) file, or it is longer than the release (a leftover
+            # from an older, bigger one). Only the first may be used.
+            total = range_total(r.headers.get("Content-Range"))
+            if total is None:
+                total = remote_size(url)
+            stale_part = total is None or part_path.stat().st_size != total
+        else:
+            r.raise_for_status()
+
+            resumed = r.status_code == 206
+            if not resumed:
+                etag = r.headers.get("ETag")
+                if etag:
+                    part_etag_path.write_text(etag)
+                elif part_etag_path.exists():
+                    part_etag_path.unlink()
+
+            with open(part_path, "ab" if resumed else "wb") as f:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+
+    if stale_part:
+        # Start over without a Range header
+        discard_part(part_path, part_etag_path)
+        return download_database(url, db_path)
+
+    expected = st.secrets.get("DB_SHA256")
+    if expected and file_sha256(part_path) != expected.strip().lower():
+        discard_part(part_path, part_etag_path)
+        raise ValueError("Downloaded workforce.db does not match DB_SHA256.")
+
+    os.replace(part_path, db_path)
+    if part_etag_path.exists():
+        part_etag_path.unlink()
+    return etag
+
+def database_version(db_path: str) -> str:
+    # Changes whenever a download replaces the file (mtime + size)
+    stat = os.stat(db_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
 def ensure_database() -> str:
     """
     Ensures the DuckDB file (workforce.db) exists locally.
     If not, downloads it from GitHub Releases via DB_URL.
+    An existing copy is reused as long as the release's ETag still matches
+    the one recorded next to it (workforce.etag); that check runs at most
+    once per RELEASE_CHECK_INTERVAL per process, not once per session.
     """
 
     db_path = Path("database") / "workforce.db"
 
-    # If DB already exists locally, use it
-    if db_path.exists():
+    # With a local copy, never make a session wait on another one's
+    # check or refresh: it keeps using the copy it has
+    if not _release_lock.acquire(blocking=not db_path.exists()):
         return str(db_path)
+    try:
+        return _ensure_database(db_path)
+    finally:
+        _release_lock.release()
+
+def _ensure_database(db_path: Path) -> str:
+    global _last_release_check
+
+    etag_path = db_path.with_suffix(".etag")
+
+    # If DB already exists locally, use it unless the release has changed
+    if db_path.exists():
+        if "DB_URL" not in st.secrets:
+            return str(db_path)
+
+        if time.monotonic() - _last_release_check < RELEASE_CHECK_INTERVAL:
+            return str(db_path)
+        _last_release_check = time.monotonic()
+
+        etag = remote_etag(st.secrets["DB_URL"])
+        if etag is None:
+            return str(db_path)
+
+        # A copy with no recorded ETag predates this check: adopt it as-is
+        if not etag_path.exists():
+            etag_path.write_text(etag)
+            return str(db_path)
+
+        if etag_path.read_text() == etag:
+            return str(db_path)
+
+        st.info("A newer workforce database has been published.")
 
     # If the DB does not exist locally, we MUST download it
     if "DB_URL" not in st.secrets:
@@ -27,24 +192,29 @@ def ensure_database() -> str:
 
     st.info("Downloading workforce database from GitHub Release…")
 
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/octet-stream",
-    }
-
     try:
         db_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with requests.get(url, stream=True, headers=headers, allow_redirects=True) as r:
-            r.raise_for_status()
-            with open(db_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+        etag = download_database(url, db_path)
 
     except Exception as e:
+        # A failed refresh keeps serving the copy already on disk
+        # (any .part is kept for a later resume)
+        if db_path.exists():
+            if isinstance(e, PermissionError):
+                # Windows can't replace a file this process has open; the
+                # complete .part is swapped in on the next start
+                st.warning("A newer workforce database was downloaded; it will be used after the app restarts.")
+            else:
+                st.warning(f"Could not refresh workforce.db, using the existing copy: {e}")
+            return str(db_path)
         st.error(f"Error downloading workforce.db: {e}")
         raise
 
+    if etag:
+        etag_path.write_text(etag)
+    elif etag_path.exists():
+        etag_path.unlink()
+
+    _last_release_check = time.monotonic()
     st.success("Database downloaded successfully.")
     return str(db_path)
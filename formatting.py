@@ -0,0 +1,27 @@
+# formatting.py
+#
+# Display formatters shared by app.py and analytics_response.py.
+# Values that can't be parsed are returned unchanged.
+
+from typing import Any
+
+
+def fmt_ci(value: Any) -> str:
+    try:
+        v = float(value)
+        return f"CI${v:,.0f}"
+    except:
+        return value
+
+def fmt_ci_dec(value: Any) -> str:
+    try:
+        v = float(value)
+        return f"CI${v:,.2f}"
+    except:
+        return value
+
+def fmt_int(value: Any) -> str:
+    try:
+        return f"{int(value):,}"
+    except:
+        return value
@@ -0,0 +1,53 @@
+# prompt_text.py
+#
+# Token-budgeted text for GPT prompts, shared by app.py and
+# analytics_response.py.
+
+import pandas as pd
+import streamlit as st
+import tiktoken
+
+
+# Rough size of a token, for when the tokenizer isn't available
+CHARS_PER_TOKEN = 4
+
+@st.cache_resource(show_spinner=False)
+def get_encoder():
+    # gpt-4o family tokenizer; loading it is slow, so once per process.
+    # tiktoken downloads the encoding on first use, so with no network
+    # (or a blocked host) this is None and budgets fall back to characters
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    # Cut on a token boundary rather than a character count
+    enc = get_encoder()
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    ids = enc.encode(text)
+    if len(ids) <= max_tokens:
+        return text
+    return enc.decode(ids[:max_tokens])
+
+# Token budget for one table sample in a prompt
+SAMPLE_TOKENS = 3000
+
+def truncate_rows(text: str, max_tokens: int) -> str:
+    # truncate_tokens for line-per-row text: drops the partial last row
+    cut = truncate_tokens(text, max_tokens)
+    if len(cut) == len(text):
+        return text
+    return cut[:cut.rfind("\n") + 1]
+
+def max_sample_rows(n_columns: int, max_tokens: int) -> int:
+    # Every cell costs at least a token, so rows past this can never fit:
+    # cap them before formatting/encoding rather than after
+    return max_tokens // max(n_columns, 1)
+
+def frame_tsv(df: pd.DataFrame, max_tokens: int = SAMPLE_TOKENS) -> str:
+    # Prompt sample: tab-separated, no index or column padding, and only
+    # as many whole rows as fit the token budget
+    df = df.head(max_sample_rows(len(df.columns), max_tokens))
+    return truncate_rows(df.to_csv(index=False, sep="\t"), max_tokens)
@@ -0,0 +1,56 @@
+# routing.py
+#
+# Keyword routing for free-text questions. Kept free of Streamlit and
+# DuckDB so it can be checked on its own (tests/test_routing.py).
+
+import re
+
+
+def keyword_re(keywords, whole_words: bool = False) -> re.Pattern:
+    """
+    One compiled alternation over `keywords` (longest first), so a question
+    is scanned once however many keywords there are. Matches always start
+    at a word boundary; whole_words also requires one at the end.
+    """
+    alternation = "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})" + (r"\b" if whole_words else ""))
+
+# Stems that signal an ICT-focused question, matched at a word start:
+# "engineer" also covers "engineering", "cyber" "cybersecurity",
+# "computer" "computers", "tech" "technology"
+TECH_STEMS = frozenset({"tech", "software", "developer", "computer", "engineer", "cyber"})
+
+# Too short to use as prefixes ("it" would fire on "item"): whole words only
+TECH_WORDS = frozenset({"it", "ict"})
+
+TECH_TERMS_RE = re.compile(
+    keyword_re(TECH_STEMS).pattern + "|" + keyword_re(TECH_WORDS, whole_words=True).pattern
+)
+
+def is_tech_question(q: str) -> bool:
+    return bool(TECH_TERMS_RE.search(q.lower()))
+
+# Ask Anything intents in precedence order: (intent, keywords that must all appear)
+INTENT_RULES = (
+    ("top_tech", frozenset({"most tech"})),
+    ("bottom_tech", frozenset({"least tech"})),
+    ("entry_tech", frozenset({"entry", "tech"})),
+    ("high_salary", frozenset({"highest", "salary"})),
+    ("low_salary", frozenset({"lowest", "salary"})),
+    ("avg_salary", frozenset({"average", "salary"})),
+    ("salary_trend", frozenset({"trend", "salary"})),
+)
+
+# Plain substring matches, like the `kw in q` checks this replaced:
+# "tech" also covers "fintech" and "technology"
+INTENT_KEYWORDS_RE = re.compile("|".join(
+    re.escape(kw)
+    for kw in sorted({kw for _, kws in INTENT_RULES for kw in kws}, key=len, reverse=True)
+))
+
+def classify_intent(q: str) -> str:
+    hits = set(INTENT_KEYWORDS_RE.findall(q.lower()))
+    for intent, required in INTENT_RULES:
+        if required <= hits:
+            return intent
+    return "general"
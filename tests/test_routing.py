@@ -0,0 +1,89 @@
+import unittest
+
+from routing import classify_intent, is_tech_question
+
+
+# The substring check routing.py replaced
+OLD_TECH_TERMS = ["tech", "ict", "it ", "it job", "technology", "software",
+                  "developer", "computer", "engineer", "cyber"]
+
+def old_is_tech_question(q):
+    q = q.lower()
+    return any(t in q for t in OLD_TECH_TERMS)
+
+
+class TechQuestionTest(unittest.TestCase):
+
+    # (question, ICT subset?) — all agree with the old substring check
+    CASES = [
+        ("How many cybersecurity roles were posted?", True),
+        ("data engineering demand", True),
+        ("engineering jobs by employer", True),
+        ("programmers and computers", True),
+        ("Which IT jobs pay best?", True),
+        ("software developers hiring now", True),
+        ("ICT roles in 2024", True),
+        ("technology sector growth", True),
+        ("Technical support vacancies", True),
+        ("nursing vacancies by employer", False),
+        ("workforce development trends", False),
+        ("hospitality jobs last quarter", False),
+    ]
+
+    # Word-internal hits the old check fired on by accident
+    FIXED_FALSE_POSITIVES = [
+        "top employers by district",   # "ict"
+        "submit salaries by industry",  # "it "
+    ]
+
+    def test_matches_old_substring_routing(self):
+        for question, expected in self.CASES:
+            with self.subTest(question=question):
+                self.assertEqual(old_is_tech_question(question), expected)
+                self.assertEqual(is_tech_question(question), expected)
+
+    def test_word_internal_matches_no_longer_fire(self):
+        for question in self.FIXED_FALSE_POSITIVES:
+            with self.subTest(question=question):
+                self.assertTrue(old_is_tech_question(question))
+                self.assertFalse(is_tech_question(question))
+
+
+# The nested classify() classify_intent replaced
+def old_classify(q):
+    ql = q.lower()
+    if "most tech" in ql: return "top_tech"
+    if "least tech" in ql: return "bottom_tech"
+    if "entry" in ql and "tech" in ql: return "entry_tech"
+    if "highest" in ql and "salary" in ql: return "high_salary"
+    if "lowest" in ql and "salary" in ql: return "low_salary"
+    if "average" in ql and "salary" in ql: return "avg_salary"
+    if "trend" in ql and "salary" in ql: return "salary_trend"
+    return "general"
+
+
+class ClassifyIntentTest(unittest.TestCase):
+
+    CASES = [
+        ("Which employers post the most tech jobs?", "top_tech"),
+        ("employers with the least technology roles", "bottom_tech"),
+        ("entry level fintech jobs", "entry_tech"),
+        ("Entry-level technical positions", "entry_tech"),
+        ("highest salary by occupation", "high_salary"),
+        ("lowest salary in hospitality", "low_salary"),
+        ("lowest salaries in hospitality", "general"),
+        ("average salary for nurses", "avg_salary"),
+        ("salary trend since 2020", "salary_trend"),
+        ("almost tech roles", "top_tech"),
+        ("top employers this year", "general"),
+    ]
+
+    def test_matches_old_classify(self):
+        for question, expected in self.CASES:
+            with self.subTest(question=question):
+                self.assertEqual(old_classify(question), expected)
+                self.assertEqual(classify_intent(question), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()